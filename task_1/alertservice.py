@@ -2,6 +2,15 @@
 AlertService Module
 """
 import random
+from statistics import fmean
+
+
+# alert message for each status
+ALERT_MESSAGES = {
+    "warning": "ALERT! Value exceeds threshold!",
+    "critical": "CRITICAL ALERT! Immediate action required!",
+    "normal": "System running normally.",
+}
 
 
 class AlertService:
@@ -17,11 +26,7 @@ class AlertService:
         return status based on sensor readings.
         """
         if readings:
-            avg_temp = sum(readings) / len(readings) if readings else 0
-            if avg_temp > self.threshold:
-                self.status = "warning"
-            else:
-                self.status = "normal"
+            self.status = "warning" if fmean(readings) > self.threshold else "normal"
         else:
             # random status
             statuses = ["normal", "warning", "critical"]
@@ -31,12 +36,7 @@ class AlertService:
     
     def get_alert_message(self):
         """return alert message based on system status."""
-        if self.status == "warning":
-            return "ALERT! Value exceeds threshold!"
-        elif self.status == "critical":
-            return "CRITICAL ALERT! Immediate action required!"
-        else:
-            return "System running normally."
+        return ALERT_MESSAGES.get(self.status, ALERT_MESSAGES["normal"])
     
     def run(self):
         """main entry point for AlertService."""
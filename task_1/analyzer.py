@@ -2,6 +2,7 @@
 Analyzer Service Module
 """
 import random
+from statistics import fmean
 
 
 class Analyzer:
@@ -19,18 +20,18 @@ class Analyzer:
         if not readings:
             return None
         
-        average_temp = sum(readings) / len(readings)
+        average_temp = fmean(readings)
         return round(average_temp, 2)
     
     def detect_anomalies(self, readings):
         """
         return true if anomaly detected, false otherwise.
         """
+        if not readings:
+            return False
         normal_min, normal_max = 15.0, 35.0
-        for reading in readings:
-            if reading < normal_min or reading > normal_max:
-                return True
-        return False
+        # min/max scan the readings in C instead of a python loop with branches
+        return min(readings) < normal_min or max(readings) > normal_max
     
     def run(self):
         """main entry point for Analyzer service."""
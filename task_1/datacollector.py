@@ -8,14 +8,18 @@ import random
 class DataCollector:
     """service that collects fake sensor readings from industrial sensors."""
     
-    def __init__(self):
+    def __init__(self, num_readings=5):
         self.service_name = "DataCollector"
+        self.num_readings = num_readings
         self.readings = []
     
     def collect_sensor_data(self):
         """generate random sensor readings simulating temperature sensors."""
-        # generating 5 random temperature readings between 18 and 30 degrees Celsius
-        self.readings = [round(random.uniform(18.0, 30.0), 1) for _ in range(5)]
+        # generating random temperature readings between 18 and 30 degrees Celsius
+        # (uniform() inlined: one C-level random() call per reading)
+        rand = random.random
+        low, span = 18.0, 30.0 - 18.0
+        self.readings = [round(low + span * rand(), 1) for _ in range(self.num_readings)]
         return self.readings
     
     def run(self):
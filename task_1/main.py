@@ -1,7 +1,29 @@
 """
 main module for the configurable microservice simulator.
 """
+import copy
 import json
+import os
+from functools import lru_cache
+
+from datacollector import DataCollector
+from analyzer import Analyzer
+from alertservice import AlertService
+
+
+# service name from config.json -> service class
+SERVICES = {
+    'DataCollector': DataCollector,
+    'Analyzer': Analyzer,
+    'AlertService': AlertService,
+}
+
+
+@lru_cache(maxsize=8)
+def _read_config(config_file, mtime):
+    """parse config file; mtime is part of the cache key so an edited file is re-read."""
+    with open(config_file, 'rb') as f:
+        return json.loads(f.read())
 
 
 def load_config(config_file='config.json'):
@@ -11,9 +33,8 @@ def load_config(config_file='config.json'):
     return a dictionary with data from config.json
     """
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        return config
+        # deep copy: callers may modify their config without touching the cached one
+        return copy.deepcopy(_read_config(config_file, os.path.getmtime(config_file)))
     except FileNotFoundError:
         print(f"error: file '{config_file}' not found!")
         return None
@@ -30,22 +51,11 @@ def load_service(service_name):
     service name -> create an instance of the class
     For example: "DataCollector" -> new DataCollector()
     """
-    # simply import the needed module and class
-    if service_name == 'DataCollector':
-        from datacollector import DataCollector
-        return DataCollector()
-    
-    elif service_name == 'Analyzer':
-        from analyzer import Analyzer
-        return Analyzer()
-    
-    elif service_name == 'AlertService':
-        from alertservice import AlertService
-        return AlertService()
-    
-    else:
+    service_class = SERVICES.get(service_name)
+    if service_class is None:
         print(f"warning: unknown service '{service_name}' - skipping")
         return None
+    return service_class()
 
 
 def main():
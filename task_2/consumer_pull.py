@@ -7,11 +7,8 @@ Banking Consumer PULL
 
 import time
 import threading
-import sqlite3
-import json
-import os
-from typing import List, Dict, Any
-from event_manager import BankingEventManager
+from event_manager import BankingEventManager, EventBatch, batch_len, batch_insert_rows
+from sqlite_writer import SQLiteBatchWriter
 
 
 class BankingConsumerPull:
@@ -20,86 +17,57 @@ class BankingConsumerPull:
         self.batch_size = batch_size
         self.db_path = db_path
 
+        # Written only by the consuming thread; readers may see a value one batch behind.
         self.events_processed = 0
-        self.lock = threading.Lock()
         self.start_time = None
         self.end_time = None
         self.running = False
+        # Set once start_consuming() is running, so callers need not sleep before producing.
+        self.ready = threading.Event()
 
-        self._init_database()
+        # Rows are built on the consuming thread; the writer's own thread owns the commits.
+        self._writer = SQLiteBatchWriter(db_path)
 
-    def _init_database(self):
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+    @property
+    def events_stored(self) -> int:
+        return self._writer.events_stored
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS banking_events (
-                event_id INTEGER PRIMARY KEY,
-                event_type TEXT NOT NULL,
-                account_id TEXT NOT NULL,
-                amount REAL NOT NULL,
-                timestamp REAL NOT NULL,
-                transaction_id TEXT UNIQUE NOT NULL,
-                country_code CHAR(2),
-                channel TEXT,
-                currency TEXT,
-                status TEXT,
-                processed_at REAL,
-                payload JSON
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_account_id ON banking_events(account_id, country_code, channel)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON banking_events(timestamp, country_code, channel)")
-        conn.commit()
-        conn.close()
+    def configure_bulk_load(self):
+        """Switch the database to bulk-load pragmas; call before any events are produced."""
+        self._writer.configure_bulk_load()
 
-    def _bulk_insert(self, events: List[Dict[str, Any]]):
-        if not events:
-            return
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        data = [
-            (
-                e['event_id'], e['event_type'], e['account_id'], e['amount'], e['timestamp'],
-                e['transaction_id'], e['metadata'].get('country_code'), e['metadata'].get('channel'), e['metadata'].get('currency'),
-                e['metadata'].get('status'), time.time(), json.dumps(e) 
-            )
-            for e in events
-        ]
-        cursor.executemany("""
-            INSERT OR IGNORE INTO banking_events
-            (event_id, event_type, account_id, amount, timestamp, transaction_id, country_code, channel, currency, status, processed_at, payload)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, data)
-        conn.commit()
-        conn.close()
+    def _bulk_insert(self, batch: EventBatch):
+        # The record batch's columns zip straight into rows in INSERT column order.
+        self._writer.put(list(batch_insert_rows(batch)))
 
     def start_consuming(self):
         self.running = True
-        batch: List[Dict[str, Any]] = []
         self.start_time = time.perf_counter()
+        self.ready.set()
 
-        while self.running or self.manager.has_events():
-            event = self.manager.get_event(timeout=0.05)
-            if event:
-                batch.append(event)
-                if len(batch) >= self.batch_size:
-                    self._bulk_insert(batch)
-                    with self.lock:
-                        self.events_processed += len(batch)
-                    batch = []
-
-        if batch:
-            self._bulk_insert(batch)
-            with self.lock:
-                self.events_processed += len(batch)
-        self.end_time = time.perf_counter()
+        try:
+            while self.running or self.manager.has_events():
+                batch = self.manager.get_batch(timeout=0.05)
+                if batch is not None:
+                    try:
+                        self._bulk_insert(batch)
+                        self.events_processed += batch_len(batch)
+                    finally:
+                        # acknowledge even a failed batch, so manager.join() cannot hang on it
+                        self.manager.task_done()
+        finally:
+            self.close()
+            self.end_time = time.perf_counter()
 
     def stop(self):
+        # The consuming thread closes the connection itself once the queue is drained,
+        # so stop() never pulls the connection out from under an in-flight insert.
         self.running = False
 
+    def close(self):
+        """Flush pending batches, stop the writer thread and close the connection."""
+        self._writer.close()
+
     def get_processing_stats(self):
         duration = (self.end_time - self.start_time) if self.start_time and self.end_time else 0
         return {
@@ -109,11 +77,5 @@ class BankingConsumerPull:
         }
 
     def get_database_stats(self):
-        if not os.path.exists(self.db_path):
-            return {'stored_count': 0}
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM banking_events")
-        count = cursor.fetchone()[0]
-        conn.close()
-        return {'stored_count': count}
+        # Read back from the database after close(), so it checks what the writer reports.
+        return {'stored_count': self._writer.count_rows()}
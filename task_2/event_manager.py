@@ -4,15 +4,19 @@ event_manager.py
 Banking Event Manager - improved implementation.
 
 Features:
-- Thread-safe in-memory queue for PULL model (uses queue.Queue with task_done/join).
+- Thread-safe in-memory queue for PULL model (collections.deque + threading.Event wakeups,
+  with queue.Queue-style task_done/join).
 - True batch PUSH model (push_batches) and single-event push.
+- Batches travel as columnar record batches (one column per field); the PULL queue holds one
+  item per record batch, never one per event.
 - Register either per-event callbacks or batch callbacks.
 - Callbacks are invoked without holding internal locks to avoid blocking producers.
 - Optional asynchronous dispatch (ThreadPoolExecutor) to offload callback execution.
 - Graceful shutdown support and simple stats.
 """
 
-from typing import Optional, Dict, Any, Callable, List
+from typing import Optional, Dict, Any, Callable, Deque, Tuple, Sequence, Iterator, NamedTuple
+from collections import deque
 import threading
 import queue
 import time
@@ -23,10 +27,65 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
-# Types for callbacks
-Event = Dict[str, Any]
+# transaction_id is derived from event_id, so it is formatted only when a row is stored
+format_transaction_id: Callable[[int], str] = 'TXN{:010d}'.format
+
+
+class BankingEvent(NamedTuple):
+    """One banking event: a flat tuple (no per-event dict)."""
+    event_id: int
+    event_type: str
+    account_id: str
+    amount: float
+    timestamp: float
+    country_code: str
+    channel: str
+    currency: str
+    status: str
+
+    @property
+    def transaction_id(self) -> str:
+        return format_transaction_id(self.event_id)
+
+
+# Column order of record batches and event rows; the consumers' INSERT takes these
+# columns followed by transaction_id (see batch_insert_rows)
+BATCH_FIELDS = BankingEvent._fields
+
+# Types for events and callbacks
+Event = BankingEvent
+# Flat tuple of one event's values in BATCH_FIELDS order (a BankingEvent is one too)
+EventRow = Tuple[Any, ...]
+# Struct-of-arrays record batch: field name -> equal-length column
+EventBatch = Dict[str, Sequence[Any]]
 EventCallback = Callable[[Event], None]
-EventBatchCallback = Callable[[List[Event]], None]
+EventBatchCallback = Callable[[EventBatch], None]
+
+
+def batch_len(batch: EventBatch) -> int:
+    """Number of events in a record batch."""
+    return len(batch['event_id'])
+
+
+def batch_rows(batch: EventBatch) -> Iterator[EventRow]:
+    """Iterate a record batch as EventRow tuples (zip runs in C, no per-event dicts)."""
+    return zip(*[batch[name] for name in BATCH_FIELDS])
+
+
+def batch_insert_rows(batch: EventBatch) -> Iterator[EventRow]:
+    """Iterate a record batch as INSERT rows: BATCH_FIELDS plus the formatted transaction_id."""
+    return zip(*[batch[name] for name in BATCH_FIELDS], map(format_transaction_id, batch['event_id']))
+
+
+def batch_events(batch: EventBatch) -> Iterator[BankingEvent]:
+    """Iterate a record batch as BankingEvent tuples (for per-event callbacks)."""
+    return map(BankingEvent._make, batch_rows(batch))
+
+
+def events_to_batch(events: Sequence[EventRow]) -> EventBatch:
+    """Build a record batch from events (BankingEvent or any row in BATCH_FIELDS order)."""
+    columns = zip(*events) if events else [()] * len(BATCH_FIELDS)
+    return dict(zip(BATCH_FIELDS, map(list, columns)))
 
 
 class BankingEventManager:
@@ -34,9 +93,8 @@ class BankingEventManager:
     Manages banking event storage and dispatching for both PULL and PUSH models.
 
     Usage patterns:
-      - Producer: event_manager.add_event(event) or add_events_batch([...])
-      - PULL Consumer: event = event_manager.get_event(); ...; event_manager.task_done()
-      - Or use get_events_batch(batch_size) which returns up to batch_size events.
+      - Producer: event_manager.add_event(event) or add_events_batch(record_batch)
+      - PULL Consumer: batch = event_manager.get_batch(); ...; event_manager.task_done()
       - PUSH Consumer: register_push_callback(cb) for single events, or
                        register_push_batch_callback(cb_batch) for batches.
       - To stop and wait: event_manager.stop(); event_manager.join()
@@ -49,16 +107,33 @@ class BankingEventManager:
     ):
         """
         Args:
-            max_queue_size: maximum size of the internal queue (0 = unlimited).
+            max_queue_size: maximum number of queued record batches (0 = unlimited).
             push_executor_workers: if provided (>0), use a ThreadPoolExecutor with that many workers
                                    to asynchronously call push callbacks (prevents producer blocking).
         """
-        self.events: queue.Queue = queue.Queue(maxsize=max_queue_size) if max_queue_size > 0 else queue.Queue()
-        self._queue_lock = threading.Lock()
+        # deque.append/popleft are atomic in CPython, so the queue itself needs no lock;
+        # _not_empty only wakes consumers that found it empty.
+        self.events: Deque[EventBatch] = deque()
+        self._not_empty = threading.Event()
+        # Free slots when the queue is bounded (None = unlimited).
+        self._slots: Optional[threading.BoundedSemaphore] = (
+            threading.BoundedSemaphore(max_queue_size) if max_queue_size > 0 else None
+        )
+        # Unfinished work for task_done()/join(), same contract as queue.Queue (in batches).
+        self._unfinished_tasks = 0
+        self._all_tasks_done = threading.Condition()
+        # Events (not batches) currently waiting in the queue; guarded by _all_tasks_done.
+        self._queued_events = 0
+        # Event totals, also guarded by _all_tasks_done: each batch updates them under the
+        # one acquisition it already makes (queued) or a single one (pushed).
+        self._total_events_received = 0
+        self._total_events_pushed = 0
 
-        # Push callbacks: per-event and per-batch
-        self._push_event_callbacks: List[EventCallback] = []
-        self._push_batch_callbacks: List[EventBatchCallback] = []
+        # Push callbacks: per-event and per-batch.
+        # Stored as tuples and replaced copy-on-write under _push_lock, so the push path
+        # reads them without locking (attribute rebinding is atomic).
+        self._push_event_callbacks: Tuple[EventCallback, ...] = ()
+        self._push_batch_callbacks: Tuple[EventBatchCallback, ...] = ()
         self._push_lock = threading.Lock()
 
         # Optional executor to call callbacks asynchronously (so producer doesn't block)
@@ -66,11 +141,11 @@ class BankingEventManager:
         if push_executor_workers and push_executor_workers > 0:
             self._push_executor = ThreadPoolExecutor(max_workers=push_executor_workers)
 
-        # Counters and control
-        self._total_events_received = 0
-        self._total_events_pushed = 0
-        self._total_events_queued = 0
+        # The sole batch callback when it is the only subscriber and there is no executor;
+        # push_events_batch then calls it directly, skipping the dispatch helpers.
+        self._fast_push: Optional[EventBatchCallback] = None
 
+        # Control
         self._stopped = threading.Event()
 
     # ---------------------------
@@ -78,115 +153,109 @@ class BankingEventManager:
     # ---------------------------
     def add_event(self, event: Event, block: bool = False, timeout: Optional[float] = None) -> None:
         """
-        Add a single event to the queue for PULL consumers.
+        Add a single event to the queue for PULL consumers (as a one-event record batch).
 
         Args:
-            event: event dict
+            event: BankingEvent
             block: whether to block if the queue is full
             timeout: timeout for blocking put
         """
-        try:
-            if block:
-                self.events.put(event, block=True, timeout=timeout)
-            else:
-                self.events.put_nowait(event)
-            with self._queue_lock:
-                self._total_events_received += 1
-                self._total_events_queued += 1
-        except queue.Full:
-            # fallback: block briefly to avoid losing the event
-            logger.warning("Queue full - blocking put for event")
-            self.events.put(event, block=True, timeout=1.0)
-            with self._queue_lock:
-                self._total_events_received += 1
-                self._total_events_queued += 1
-
-    def add_events_batch(self, events: List[Event], block: bool = False) -> None:
+        self._put(events_to_batch([event]), block, timeout)
+
+    def add_events_batch(self, batch: EventBatch, block: bool = False) -> None:
         """
-        Add a list of events to the queue. Attempts to use non-blocking puts first.
+        Add a record batch to the queue as a single item; the columns are not copied.
 
         Args:
-            events: list of event dicts
+            batch: columnar record batch (see BATCH_FIELDS)
             block: whether to block when queue is full for put
         """
-        for ev in events:
-            # try nowait for speed; fallback to blocking put if needed
-            try:
-                self.add_event(ev, block=block)
-            except Exception:
-                # fallback - ensure event is added
-                logger.exception("Error adding event in batch, retrying with blocking put")
-                self.add_event(ev, block=True, timeout=1.0)
+        if not batch_len(batch):
+            return
+        try:
+            self._put(batch, block)
+        except queue.Full:
+            # fallback - ensure the batch is added
+            logger.exception("Error adding batch, retrying with blocking put")
+            self._put(batch, True, 1.0)
+
+    def _put(self, batch: EventBatch, block: bool, timeout: Optional[float] = None) -> None:
+        self._acquire_slot(block, timeout)
+        # Count the task before the batch becomes visible so task_done() can never run ahead of it.
+        with self._all_tasks_done:
+            self._unfinished_tasks += 1
+            self._queued_events += batch_len(batch)
+            self._total_events_received += batch_len(batch)
+        self.events.append(batch)
+        self._not_empty.set()
+
+    def _acquire_slot(self, block: bool, timeout: Optional[float]) -> None:
+        """Reserve a free slot in a bounded queue (no-op when unbounded)."""
+        if self._slots is None:
+            return
+        acquired = self._slots.acquire(timeout=timeout) if block else self._slots.acquire(blocking=False)
+        if not acquired:
+            # fallback: block briefly to avoid losing the batch
+            logger.warning("Queue full - blocking put for batch")
+            if not self._slots.acquire(timeout=1.0):
+                raise queue.Full
 
     # ---------------------------
     # PULL: getting events
     # ---------------------------
-    def get_event(self, timeout: Optional[float] = None) -> Optional[Event]:
-        """
-        Get a single event from the queue.
-
-        Args:
-            timeout: seconds to wait for an event; None means block until available.
-
-        Returns:
-            Event dict or None if timeout occurred.
-        """
-        try:
-            ev = self.events.get(timeout=timeout)
-            return ev
-        except queue.Empty:
-            return None
-
-    def get_events_batch(self, batch_size: int, timeout: Optional[float] = None) -> List[Event]:
+    def get_batch(self, timeout: Optional[float] = None) -> Optional[EventBatch]:
         """
-        Get up to batch_size events from queue. This blocks for the first event up to `timeout`,
-        then drains available events with non-blocking calls.
+        Get the next record batch from the queue.
 
         Args:
-            batch_size: maximum number of events to return
-            timeout: how long to wait for the first event (None => block indefinitely)
+            timeout: seconds to wait for a batch; None means block until available.
 
         Returns:
-            list of events (may be empty)
+            EventBatch or None if timeout occurred (or the manager is stopped and the queue is empty).
         """
-        batch: List[Event] = []
-        first = self.get_event(timeout=timeout)
-        if first is None:
-            return batch
-        batch.append(first)
-        # drain rest quickly without blocking
-        for _ in range(batch_size - 1):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
             try:
-                ev = self.events.get_nowait()
-                batch.append(ev)
-            except queue.Empty:
-                break
-        return batch
+                batch = self.events.popleft()
+            except IndexError:
+                pass
+            else:
+                with self._all_tasks_done:
+                    self._queued_events -= batch_len(batch)
+                if self._slots is not None:
+                    self._slots.release()
+                return batch
+            # Clear before re-checking: an append that races with us leaves the flag set again.
+            self._not_empty.clear()
+            if self.events:
+                continue
+            if self._stopped.is_set():
+                return None
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            self._not_empty.wait(remaining)
 
     def task_done(self, n: int = 1) -> None:
         """
-        Indicate that the consumer has finished processing n items retrieved from the queue.
-        This delegates to queue.task_done() n times.
+        Indicate that the consumer has finished processing n batches retrieved from the queue.
         """
-        for _ in range(n):
-            try:
-                self.events.task_done()
-                with self._queue_lock:
-                    # Decrement queued counter (best-effort)
-                    if self._total_events_queued > 0:
-                        self._total_events_queued -= 1
-            except Exception:
+        with self._all_tasks_done:
+            if n > self._unfinished_tasks:
                 # ignore task_done if not matching get/join
                 logger.debug("task_done called too many times or when queue not tracked")
+                n = self._unfinished_tasks
+            self._unfinished_tasks -= n
+            if self._unfinished_tasks == 0:
+                self._all_tasks_done.notify_all()
 
-    def join(self, timeout: Optional[float] = None) -> None:
+    def join(self, timeout: Optional[float] = None) -> bool:
         """
-        Block until all items in the queue have been processed (queue.join()).
+        Block until all batches in the queue have been processed (task_done called for each).
+        Returns False if the timeout expired first.
         """
-        try:
-            self.events.join()  # may block until task_done called for each item
-        except Exception:
-            logger.exception("Error while waiting for queue.join()")
+        with self._all_tasks_done:
+            return self._all_tasks_done.wait_for(lambda: self._unfinished_tasks == 0, timeout=timeout)
 
     # ---------------------------
     # PUSH: callback registration
@@ -194,34 +263,48 @@ class BankingEventManager:
     def register_push_callback(self, callback: EventCallback) -> None:
         """
         Register a single-event callback for PUSH model.
-        Callback signature: callback(event_dict)
+        Callback signature: callback(banking_event)
         """
         with self._push_lock:
-            self._push_event_callbacks.append(callback)
+            self._push_event_callbacks = self._push_event_callbacks + (callback,)
+            self._update_fast_push()
 
     def unregister_push_callback(self, callback: EventCallback) -> None:
         """Unregister previously registered per-event callback (if present)."""
         with self._push_lock:
-            try:
-                self._push_event_callbacks.remove(callback)
-            except ValueError:
-                pass
+            self._push_event_callbacks = self._without(self._push_event_callbacks, callback)
+            self._update_fast_push()
 
     def register_push_batch_callback(self, callback: EventBatchCallback) -> None:
         """
         Register a batch callback for PUSH model.
-        Callback signature: callback(list_of_event_dicts)
+        Callback signature: callback(record_batch)
         """
         with self._push_lock:
-            self._push_batch_callbacks.append(callback)
+            self._push_batch_callbacks = self._push_batch_callbacks + (callback,)
+            self._update_fast_push()
 
     def unregister_push_batch_callback(self, callback: EventBatchCallback) -> None:
         """Unregister previously registered batch callback (if present)."""
         with self._push_lock:
-            try:
-                self._push_batch_callbacks.remove(callback)
-            except ValueError:
-                pass
+            self._push_batch_callbacks = self._without(self._push_batch_callbacks, callback)
+            self._update_fast_push()
+
+    def _update_fast_push(self) -> None:
+        """Recompute _fast_push after a registration change (caller holds _push_lock)."""
+        if len(self._push_batch_callbacks) == 1 and not self._push_event_callbacks and not self._push_executor:
+            self._fast_push = self._push_batch_callbacks[0]
+        else:
+            self._fast_push = None
+
+    @staticmethod
+    def _without(callbacks: Tuple[Callable, ...], callback: Callable) -> Tuple[Callable, ...]:
+        """Return callbacks minus the first occurrence of callback (unchanged if absent)."""
+        try:
+            i = callbacks.index(callback)
+        except ValueError:
+            return callbacks
+        return callbacks[:i] + callbacks[i + 1:]
 
     # ---------------------------
     # PUSH: pushing events
@@ -231,56 +314,66 @@ class BankingEventManager:
         Push a single event to registered callbacks.
 
         This method:
-          - grabs a snapshot of callbacks under lock,
-          - then calls callbacks WITHOUT holding the lock (to avoid blocking registration or other pushes).
+          - reads the current callback tuples (replaced copy-on-write, so no lock is needed),
+          - then calls callbacks WITHOUT holding any lock (to avoid blocking registration or other pushes).
           - if a push_executor is configured, callbacks will be submitted to the executor to avoid blocking producer.
         """
-        with self._push_lock:
-            event_callbacks = list(self._push_event_callbacks)
-            batch_callbacks = list(self._push_batch_callbacks)
+        event_callbacks = self._push_event_callbacks
+        batch_callbacks = self._push_batch_callbacks
 
         # If a batch callback is present, prefer to call it with single-item batch
         if batch_callbacks:
-            self._dispatch_batch_to_callbacks(batch_callbacks, [event])
+            self._dispatch_batch_to_callbacks(batch_callbacks, events_to_batch([event]))
         # Then call per-event callbacks
         if event_callbacks:
             self._dispatch_to_callbacks(event_callbacks, event)
 
-        # update counters
-        with self._queue_lock:
-            self._total_events_received += 1
-            self._total_events_pushed += 1
+        self._count_pushed(1)
 
-    def push_events_batch(self, events: List[Event]) -> None:
+    def push_events_batch(self, batch: EventBatch) -> None:
         """
-        Push a list of events to registered batch callbacks. If there are no batch callbacks,
-        fallback to pushing events individually to per-event callbacks.
+        Push a record batch to registered batch callbacks as-is. Per-event callbacks
+        receive each event as a BankingEvent.
 
         Important: this method does NOT block on callback execution if an executor is provided.
         """
-        if not events:
+        n = batch_len(batch)
+        if not n:
             return
 
-        with self._push_lock:
-            batch_callbacks = list(self._push_batch_callbacks)
-            event_callbacks = list(self._push_event_callbacks)
+        fast_push = self._fast_push
+        if fast_push is not None:
+            # single batch subscriber: hand the batch straight over
+            try:
+                fast_push(batch)
+            except Exception as exc:
+                logger.exception("Exception in push callback: %s", exc)
+            self._count_pushed(n)
+            return
+
+        batch_callbacks = self._push_batch_callbacks
+        event_callbacks = self._push_event_callbacks
 
         if batch_callbacks:
             # deliver as real batch to batch callbacks
-            self._dispatch_batch_to_callbacks(batch_callbacks, events)
+            self._dispatch_batch_to_callbacks(batch_callbacks, batch)
 
         if event_callbacks:
             # if per-event callbacks exist, deliver each event (but do not hold locks)
-            for ev in events:
-                self._dispatch_to_callbacks(event_callbacks, ev)
+            for event in batch_events(batch):
+                self._dispatch_to_callbacks(event_callbacks, event)
+
+        # These events were pushed, not queued, so only received/pushed move
+        self._count_pushed(n)
 
-        with self._queue_lock:
-            self._total_events_received += len(events)
-            # We don't increment queued counter because these events were pushed, not queued
-            self._total_events_pushed += len(events)
+    def _count_pushed(self, n: int) -> None:
+        """Add n pushed events to both totals with one lock acquisition."""
+        with self._all_tasks_done:
+            self._total_events_received += n
+            self._total_events_pushed += n
 
     # Helper dispatchers
-    def _dispatch_to_callbacks(self, callbacks: List[EventCallback], event: Event) -> None:
+    def _dispatch_to_callbacks(self, callbacks: Tuple[EventCallback, ...], event: Event) -> None:
         """Call per-event callbacks (possibly via executor)."""
         if self._push_executor:
             for cb in callbacks:
@@ -292,18 +385,18 @@ class BankingEventManager:
             for cb in callbacks:
                 self._safe_call(cb, event)
 
-    def _dispatch_batch_to_callbacks(self, callbacks: List[EventBatchCallback], events: List[Event]) -> None:
+    def _dispatch_batch_to_callbacks(self, callbacks: Tuple[EventBatchCallback, ...], batch: EventBatch) -> None:
         """Call batch callbacks (possibly via executor)."""
         if self._push_executor:
             for cb in callbacks:
                 try:
                     # submit the full batch to executor
-                    self._push_executor.submit(self._safe_call, cb, events)
+                    self._push_executor.submit(self._safe_call, cb, batch)
                 except Exception:
                     logger.exception("Failed to submit batch callback to executor")
         else:
             for cb in callbacks:
-                self._safe_call(cb, events)
+                self._safe_call(cb, batch)
 
     @staticmethod
     def _safe_call(cb: Callable, payload) -> None:
@@ -320,30 +413,30 @@ class BankingEventManager:
         """
         Signal the manager to stop. This does not forcibly clear the queue;
         consumers should finish processing events and call task_done().
+        Consumers waiting in get_batch() on an empty queue return None at once.
         """
         self._stopped.set()
+        self._not_empty.set()
 
     def stopped(self) -> bool:
         """Return True if stop() was called."""
         return self._stopped.is_set()
 
     def get_queue_size(self) -> int:
-        """Return number of items currently queued for PULL consumers."""
-        return self.events.qsize()
+        """Return number of record batches currently queued for PULL consumers."""
+        return len(self.events)
 
     def has_events(self) -> bool:
         """True when queue is not empty."""
-        return not self.events.empty()
+        return bool(self.events)
 
     def get_total_received(self) -> int:
         """Return total events received (both queued and pushed)."""
-        with self._queue_lock:
-            return int(self._total_events_received)
+        return self._total_events_received
 
     def get_total_pushed(self) -> int:
-        with self._queue_lock:
-            return int(self._total_events_pushed)
+        return self._total_events_pushed
 
     def get_total_queued(self) -> int:
-        with self._queue_lock:
-            return int(self._total_events_queued)
+        """Return number of events currently waiting in the PULL queue."""
+        return self._queued_events
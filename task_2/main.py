@@ -3,40 +3,69 @@ Main script to run and compare PULL vs PUSH event dispatching models.
 Banking-focused implementation with database persistence and bulk operations.
 """
 
+import argparse
 import threading
-import time
-import random
+from statistics import fmean, stdev
+from typing import Optional
 from producer import BankingEventProducer
 from event_manager import BankingEventManager
 from consumer_pull import BankingConsumerPull
 from consumer_push import BankingConsumerPush
 
 
-def run_pull_model(num_events: int, batch_size: int):
+def _finish_pull(manager: BankingEventManager, consumer: BankingConsumerPull, consumer_thread: threading.Thread):
+    """Wait until the consumer has taken every batch, then let it flush and exit."""
+    # A consumer thread that died leaves its batches unacknowledged, so stop waiting then.
+    while not manager.join(timeout=0.1):
+        if not consumer_thread.is_alive():
+            break
+    consumer.stop()
+    manager.stop()
+    consumer_thread.join()
+
+
+def warm_up(num_events: int = 1000):
+    """
+    Push a small throwaway run through both models (in-memory databases, nothing printed),
+    so first-use costs are paid before either measured run instead of inside the first one.
+    """
+    manager = BankingEventManager()
+    consumer = BankingConsumerPull(manager, batch_size=num_events, db_path=":memory:")
+    consumer_thread = threading.Thread(target=consumer.start_consuming, daemon=True)
+    consumer_thread.start()
+    BankingEventProducer(manager, num_events=num_events, batch_size=num_events).produce_events()
+    _finish_pull(manager, consumer, consumer_thread)
+
+    manager = BankingEventManager()
+    consumer = BankingConsumerPush(manager, db_path=":memory:")
+    consumer.register()
+    BankingEventProducer(manager, num_events=num_events, batch_size=num_events, push_mode=True).produce_events()
+    consumer.finish()
+
+
+def run_pull_model(num_events: int, batch_size: int, seed: Optional[int] = None, out_of_process: bool = False):
     print("\n" + "="*70)
     print("Running PULL Model (Banking Events)")
     print("="*70)
 
     # Initialize components
     manager = BankingEventManager()
-    producer = BankingEventProducer(manager, num_events=num_events, batch_size=batch_size, push_mode=False)
+    producer = BankingEventProducer(manager, num_events=num_events, batch_size=batch_size, push_mode=False,
+                                    seed=seed, out_of_process=out_of_process)
     consumer = BankingConsumerPull(manager, batch_size=batch_size)
+    consumer.configure_bulk_load()
 
     # Start consumer thread
     consumer_thread = threading.Thread(target=consumer.start_consuming, daemon=True)
     consumer_thread.start()
 
-    # Small delay to ensure consumer is ready
-    time.sleep(0.01)
+    consumer.ready.wait()
 
     # Produce events
     print(f"Producing {num_events:,} events...")
     producer.produce_events()
 
-    # Wait for consumer to process all events
-    consumer.stop()
-    consumer_thread.join(timeout=max(60, num_events // 1000))
-    time.sleep(0.05)  # allow final batch
+    _finish_pull(manager, consumer, consumer_thread)
 
     # Collect statistics
     prod_stats = producer.get_production_stats()
@@ -56,23 +85,24 @@ def run_pull_model(num_events: int, batch_size: int):
     }
 
 
-def run_push_model(num_events: int, batch_size: int):
+def run_push_model(num_events: int, batch_size: int, seed: Optional[int] = None, out_of_process: bool = False):
     print("\n" + "="*70)
     print("Running PUSH Model (Banking Events)")
     print("="*70)
 
     # Initialize components
     manager = BankingEventManager()
-    consumer = BankingConsumerPush(manager, batch_size=batch_size)
+    consumer = BankingConsumerPush(manager)
+    consumer.configure_bulk_load()
     consumer.register()
-    producer = BankingEventProducer(manager, num_events=num_events, batch_size=batch_size, push_mode=True)
+    producer = BankingEventProducer(manager, num_events=num_events, batch_size=batch_size, push_mode=True,
+                                    seed=seed, out_of_process=out_of_process)
 
     # Produce events (pushed directly)
     print(f"Producing {num_events:,} events...")
     producer.produce_events()
 
-    # Finish consumer
-    time.sleep(0.01)
+    # Finish consumer (delivery is synchronous, so every batch has already arrived)
     consumer.finish()
 
     # Collect statistics
@@ -93,24 +123,72 @@ def run_push_model(num_events: int, batch_size: int):
     }
 
 
-def main():
-    # Random number of events between 500 thousand and 1 million
-    num_events = random.randint(500_000, 1_000_000)
-    batch_size = max(500, min(5000, num_events // 1000))
+def _rate(results: dict) -> float:
+    return results['processed'] / results['proc_time'] if results['proc_time'] > 0 else 0
 
-    print(f"\nNumber of events: {num_events:,}, Batch size: {batch_size:,}\n")
+
+def _mean_stdev(values: list) -> tuple:
+    # stdev needs at least two samples; a single run has no spread to report
+    return fmean(values), (stdev(values) if len(values) > 1 else 0.0)
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or number < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {value!r}")
+    return number
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare PULL vs PUSH banking event dispatching.")
+    parser.add_argument('--num-events', type=_non_negative_int, default=750_000, help="events per run (default: 750,000)")
+    parser.add_argument('--batch-size', type=_positive_int, default=20_000, help="events per record batch (default: 20,000)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the generated events (default: 0)")
+    parser.add_argument('--repeats', type=_positive_int, default=1, help="runs per model, reported as mean and stdev (default: 1)")
+    parser.add_argument('--out-of-process', action='store_true',
+                        help="generate events in a child process (both models), off the consumer's GIL")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    # Fixed workload and seed, so runs (and builds) are comparable with each other;
+    # the seed only feeds each run's producer, which owns its own generator
+    args = parse_args(argv)
+    num_events, batch_size = args.num_events, args.batch_size
+
+    print(f"\nNumber of events: {num_events:,}, Batch size: {batch_size:,}, Seed: {args.seed}, Repeats: {args.repeats}\n")
     print("="*70)
     print("BANKING EVENT-BASED PUSH vs PULL DISPATCHER COMPARISON")
     print("="*70)
 
-    # Run PULL model
-    print("\n[1/2] Running PULL Model...")
-    pull_results = run_pull_model(num_events, batch_size)
-    time.sleep(2)
+    warm_up()
+
+    pull_runs, push_runs = [], []
+    for i in range(1, args.repeats + 1):
+        # Run PULL model
+        print(f"\n[{i}/{args.repeats}] Running PULL Model...")
+        # run_pull_model returns only after its queue is drained and its writer has closed,
+        # so the PUSH run can start straight away
+        pull_runs.append(run_pull_model(num_events, batch_size, seed=args.seed, out_of_process=args.out_of_process))
+
+        # Run PUSH model
+        print(f"\n[{i}/{args.repeats}] Running PUSH Model...")
+        push_runs.append(run_push_model(num_events, batch_size, seed=args.seed, out_of_process=args.out_of_process))
 
-    # Run PUSH model
-    print("\n[2/2] Running PUSH Model...")
-    push_results = run_push_model(num_events, batch_size)
+    pull_results, push_results = pull_runs[-1], push_runs[-1]
 
     # Summary
     print("\n" + "="*70)
@@ -120,14 +198,18 @@ def main():
     print(f"PULL Processed: {pull_results['processed']:,} | PUSH Processed: {push_results['processed']:,}")
     print(f"PULL DB Stored: {pull_results['db_stored']:,} | PUSH DB Stored: {push_results['db_stored']:,}")
 
-    print("\nPerformance Metrics:")
-    print(f"PULL Processing Time: {pull_results['proc_time']:.2f}s | Rate: {pull_results['processed']/pull_results['proc_time'] if pull_results['proc_time']>0 else 0:,.2f} events/sec")
-    print(f"PUSH Processing Time: {push_results['proc_time']:.2f}s | Rate: {push_results['processed']/push_results['proc_time'] if push_results['proc_time']>0 else 0:,.2f} events/sec")
+    print(f"\nPerformance Metrics (mean ± stdev over {args.repeats} run(s)):")
+    for name, runs in (("PULL", pull_runs), ("PUSH", push_runs)):
+        time_mean, time_std = _mean_stdev([r['proc_time'] for r in runs])
+        rate_mean, rate_std = _mean_stdev([_rate(r) for r in runs])
+        print(f"{name} Processing Time: {time_mean:.2f}s ± {time_std:.2f}s | Rate: {rate_mean:,.2f} ± {rate_std:,.2f} events/sec")
     print("="*70 + "\n")
 
     return {
         'pull': pull_results,
-        'push': push_results
+        'push': push_results,
+        'pull_runs': pull_runs,
+        'push_runs': push_runs
     }
 
 
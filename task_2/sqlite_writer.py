@@ -0,0 +1,197 @@
+"""
+SQLite Batch Writer
+
+Общий writer для PULL и PUSH consumer: одно соединение SQLite, отдельный поток
+записи и group commit для batch insert.
+"""
+
+import os
+import time
+import threading
+import queue
+import logging
+import sqlite3
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# One shared string so sqlite3's per-connection statement cache reuses the prepared INSERT.
+# Column order matches event_manager.batch_insert_rows(), whose rows bind directly.
+_INSERT_SQL = (
+    "INSERT OR IGNORE INTO banking_events "
+    "(event_id, event_type, account_id, amount, timestamp, country_code, channel, currency, status, transaction_id) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Group commit: the writer folds up to this many queued batches into one transaction...
+_GROUP_COMMIT_BATCHES = 10
+# ...waiting at most this long (seconds) after the first batch for the rest to arrive.
+_GROUP_COMMIT_WINDOW = 0.01
+
+
+class SQLiteBatchWriter:
+    """
+    Owns a consumer's SQLite connection and the single thread that commits to it.
+
+    Consumers build rows on their own thread and hand whole batches to put();
+    close() flushes everything still queued and closes the connection.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+        # Both written only by the writer thread; readers may see a value one group behind.
+        # rows of committed batches
+        self.rows_written = 0
+        # rows actually inserted (INSERT OR IGNORE skips duplicates)
+        self.events_stored = 0
+
+        self._conn: Optional[sqlite3.Connection] = self._open_connection()
+        self._init_database()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=8)
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def _init_database(self):
+        # Start every run from an empty table on the already-open connection
+        # (db_path=":memory:" therefore gives a run with no disk I/O at all).
+        self._conn.executescript("""
+            BEGIN;
+            DROP TABLE IF EXISTS banking_events;
+            CREATE TABLE banking_events (
+                event_id INTEGER PRIMARY KEY,
+                event_type TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                amount REAL NOT NULL,
+                timestamp REAL NOT NULL,
+                transaction_id TEXT UNIQUE NOT NULL,
+                country_code CHAR(2),
+                channel TEXT,
+                currency TEXT,
+                status TEXT,
+                processed_at REAL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+            );
+            CREATE INDEX idx_account_id ON banking_events(account_id, country_code, channel);
+            CREATE INDEX idx_timestamp ON banking_events(timestamp, country_code, channel);
+            COMMIT;
+        """)
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open the connection reused by every batch insert (autocommit, WAL)."""
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                               cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        return conn
+
+    def configure_bulk_load(self):
+        """
+        Trade durability for insert speed: no fsync and an in-memory rollback journal.
+        A crash mid-run can corrupt the database, which is acceptable for a table rebuilt
+        from scratch on every run. Call before any rows are put().
+        """
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("PRAGMA journal_mode=MEMORY")
+
+    def put(self, rows: List[tuple]):
+        """
+        Queue one batch of INSERT rows (blocks while the writer is 8 batches behind).
+        Raises RuntimeError once the writer thread has died, instead of blocking forever.
+        """
+        if not rows:
+            return
+        while True:
+            if not self._thread.is_alive():
+                raise RuntimeError("SQLite writer thread is not running")
+            try:
+                self._queue.put(rows, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _writer_loop(self):
+        """
+        Drain ready-made row batches into SQLite until the None sentinel arrives.
+
+        Batches are group-committed: up to _GROUP_COMMIT_BATCHES batches, or whatever
+        arrives within _GROUP_COMMIT_WINDOW seconds of the first, share one transaction
+        and therefore one journal sync.
+        """
+        try:
+            self._drain_queue()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def _drain_queue(self):
+        stopping = False
+        while not stopping:
+            group = [self._queue.get()]
+            deadline = time.monotonic() + _GROUP_COMMIT_WINDOW
+            while group[-1] is not None and len(group) < _GROUP_COMMIT_BATCHES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if group[-1] is None:
+                group.pop()
+                stopping = True
+            if group:
+                self._write_group(group)
+
+    def _write_group(self, group: List[List[tuple]]):
+        if self._commit(group) or len(group) == 1:
+            return
+        # One bad batch must not take the rest of the group with it: retry each on its own.
+        for rows in group:
+            self._commit([rows])
+
+    def _commit(self, group: List[List[tuple]]) -> bool:
+        """Insert the batches in one transaction; on failure roll back and return False."""
+        try:
+            self._conn.execute("BEGIN")
+            inserted = 0
+            for rows in group:
+                inserted += self._conn.executemany(_INSERT_SQL, rows).rowcount
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            logger.exception("Failed to write %d batches (%d events)", len(group), sum(map(len, group)))
+            try:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                logger.exception("Rollback failed")
+            return False
+        self.rows_written += sum(map(len, group))
+        self.events_stored += inserted
+        return True
+
+    def close(self):
+        """Flush pending batches, stop the writer thread and close the connection."""
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+
+    def count_rows(self) -> int:
+        """
+        Count the table's rows through a fresh connection, independently of the insert path.
+        Call after close(), outside any timed window (an in-memory database reports 0).
+        """
+        if not os.path.exists(self.db_path):
+            return 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM banking_events").fetchone()[0]
+        finally:
+            conn.close()